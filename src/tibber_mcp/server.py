@@ -1,17 +1,28 @@
 import asyncio
+import io
+import logging
 import os
-from datetime import datetime, timezone, timedelta
-import sys
-from typing import Any
+from datetime import date, datetime, timezone, timedelta
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, Literal
 
+import aiohttp
 from mcp.server.models import InitializationOptions
 import mcp.types as types
 from mcp.server import NotificationOptions, Server
-from pydantic import AnyUrl
+from pydantic import AnyUrl, Field, TypeAdapter
 import mcp.server.stdio
-from tibber import Tibber
+from tibber import Tibber, TibberHome
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "fast" extra
+    orjson = None
 
 server = Server("tibber-mcp")
+logger = logging.getLogger(__name__)
 
 # Initialize Tibber client
 ACCESS_TOKEN = os.getenv("TIBBER_TOKEN")
@@ -21,486 +32,991 @@ if not ACCESS_TOKEN:
 # Constants for Tibber client
 USER_AGENT = "tibber-mcp/0.1.0"
 TIMEOUT = 30  # seconds
+# Maximum number of GraphQL requests in flight at once
+try:
+    MAX_CONCURRENCY = int(os.getenv("TIBBER_MAX_CONCURRENCY", "8"))
+except ValueError:
+    MAX_CONCURRENCY = 0
+if MAX_CONCURRENCY < 1:
+    raise ValueError("TIBBER_MAX_CONCURRENCY must be a positive integer")
+
+# Response cache lifetimes
+HOMES_CACHE_TTL = 3600  # seconds
+PRICE_CACHE_TTL = 300  # seconds
+HISTORIC_CACHE_TTL = 900  # seconds
+
+# Tomorrow's prices are published around 13:00 CET/CEST; from this UTC hour on,
+# price info is refreshed until they show up
+TOMORROW_PRICES_UTC_HOUR = 11
+
+# Timestamp format for consumption/production rows
+ROW_TIME_FORMAT = '%Y-%m-%d %H:%M UTC'
+
+# Seconds to wait for a fresh real-time reading before giving up
+RT_SAMPLE_TIMEOUT = 30.0
+# Age in seconds after which a stored real-time reading is no longer served
+RT_MAX_SAMPLE_AGE = 60.0
+
+# Maximum number of rows per text block in get-historic responses
+HISTORIC_CHUNK_SIZE = 100
+
+# Row templates for consumption/production data, filled with preformatted strings
+CONSUMPTION_ROW = "\n\nTime: {t}\nConsumption: {v}\nCost: {c}"
+PRODUCTION_ROW = "\n\nTime: {t}\nProduction: {v}\nProfit: {c}"
+
+# Subscription statuses pyTibber treats as active
+ACTIVE_SUBSCRIPTION_STATUSES = (
+    "running",
+    "awaiting market",
+    "awaiting time restriction",
+    "awaiting termination",
+)
+
+# Everything list-homes renders, for all homes in a single GraphQL request
+HOMES_QUERY = """
+{
+  viewer {
+    homes {
+      id
+      appNickname
+      features {
+        realTimeConsumptionEnabled
+      }
+      address {
+        address1
+        country
+      }
+      meteringPointData {
+        energyTaxType
+        estimatedAnnualConsumption
+        gridCompany
+        productionEan
+        vatType
+      }
+      currentSubscription {
+        status
+        priceInfo {
+          current {
+            currency
+          }
+        }
+      }
+    }
+  }
+}
+"""
 
 tibber_connection = None
+_connection_lock = asyncio.Lock()
+_GQL_SEM = asyncio.Semaphore(MAX_CONCURRENCY)
 
+# Cached tool responses keyed by (tool name, *args), mapped to (expiry, response)
+_CACHE: dict[tuple, tuple[float, list[types.TextContent]]] = {}
+_CACHE_LOCKS: dict[tuple, asyncio.Lock] = {}
 
+# Homes of the current connection by ID, rebuilt whenever it reconnects
+_HOMES_BY_ID: dict[str, TibberHome] = {}
 
-@server.list_tools()
-async def handle_list_tools() -> list[types.Tool]:
-    """List available tools for interacting with Tibber data."""
-    return [
-        types.Tool(
-            name="list-homes",
-            description="List all Tibber homes and their basic information",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-            }
-        ),
-        types.Tool(
-            name="get-consumption", 
-            description="Get energy consumption data for a specific home",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "home_id": {
-                        "type": "string",
-                        "description": "The Tibber home ID"
-                    },
-                    "hours": {
-                        "type": "integer",
-                        "description": "Number of hours of historical data to retrieve",
-                        "default": 24
-                    }
+# IDs of homes whose info (currency, features, metering data) has been loaded
+_initialized_homes: set[str] = set()
+
+# Start of the UTC hour in which each home's price info was last fetched
+_price_info_fetched_at: dict[str, datetime] = {}
+
+# Persistent real-time subscriptions: latest sample with its monotonic receive
+# time, and new-sample event per home
+_rt_subscribed: set[str] = set()
+_rt_latest: dict[str, tuple[float, dict]] = {}
+_rt_events: dict[str, asyncio.Event] = {}
+
+# Rendered price statistics per home, with the UTC hour they were computed in
+_price_stats: dict[str, tuple[datetime, list[str]]] = {}
+
+
+
+# Tool definitions are static, so they are built once at import time
+_TOOLS: list[types.Tool] = [
+    types.Tool(
+        name="list-homes",
+        description="List all Tibber homes and their basic information",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+        }
+    ),
+    types.Tool(
+        name="get-consumption", 
+        description="Get energy consumption data for a specific home",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "home_id": {
+                    "type": "string",
+                    "description": "The Tibber home ID"
                 },
-                "required": ["home_id"]
-            }
-        ),
-        types.Tool(
-            name="get-production",
-            description="Get energy production data for a specific home",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "home_id": {
-                        "type": "string",
-                        "description": "The Tibber home ID"
-                    },
-                    "hours": {
-                        "type": "integer",
-                        "description": "Number of hours of historical data to retrieve",
-                        "default": 24
-                    }
+                "hours": {
+                    "type": "integer",
+                    "description": "Number of hours of historical data to retrieve",
+                    "minimum": 1,
+                    "default": 24
+                }
+            },
+            "required": ["home_id"]
+        }
+    ),
+    types.Tool(
+        name="get-production",
+        description="Get energy production data for a specific home",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "home_id": {
+                    "type": "string",
+                    "description": "The Tibber home ID"
                 },
-                "required": ["home_id"]
-            }
-        ),
-        types.Tool(
-            name="get-price-info",
-            description="Get current and upcoming electricity prices for a specific home",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "home_id": {
-                        "type": "string",
-                        "description": "The Tibber home ID"
-                    }
+                "hours": {
+                    "type": "integer",
+                    "description": "Number of hours of historical data to retrieve",
+                    "minimum": 1,
+                    "default": 24
+                }
+            },
+            "required": ["home_id"]
+        }
+    ),
+    types.Tool(
+        name="get-price-info",
+        description="Get current and upcoming electricity prices for a specific home",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "home_id": {
+                    "type": "string",
+                    "description": "The Tibber home ID"
+                }
+            },
+            "required": ["home_id"]
+        }
+    ),
+    types.Tool(
+        name="get-realtime",
+        description="Get latest real-time power readings from a home",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "home_id": {
+                    "type": "string",
+                    "description": "The Tibber home ID"
+                }
+            },
+            "required": ["home_id"]
+        }
+    ),
+    types.Tool(
+        name="get-historic",
+        description="Get historical data with custom resolution and optional start date",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "home_id": {
+                    "type": "string",
+                    "description": "The Tibber home ID"
                 },
-                "required": ["home_id"]
-            }
-        ),
-        types.Tool(
-            name="get-realtime",
-            description="Get latest real-time power readings from a home",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "home_id": {
-                        "type": "string",
-                        "description": "The Tibber home ID"
-                    }
+                "resolution": {
+                    "type": "string",
+                    "description": "Time resolution of data",
+                    "enum": ["HOURLY", "DAILY", "WEEKLY", "MONTHLY", "ANNUAL"],
+                    "default": "HOURLY"
                 },
-                "required": ["home_id"]
-            }
-        ),
-        types.Tool(
-            name="get-historic",
-            description="Get historical data with custom resolution and optional start date",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "home_id": {
-                        "type": "string",
-                        "description": "The Tibber home ID"
-                    },
-                    "resolution": {
-                        "type": "string",
-                        "description": "Time resolution of data",
-                        "enum": ["HOURLY", "DAILY", "WEEKLY", "MONTHLY", "ANNUAL"],
-                        "default": "HOURLY"
-                    },
-                    "count": {
-                        "type": "integer",
-                        "description": "Number of data points to retrieve. If start_date is provided and count is 0, will fetch until end of month.",
-                        "default": 24
-                    },
-                    "production": {
-                        "type": "boolean",
-                        "description": "Get production instead of consumption data",
-                        "default": False
-                    },
-                    "start_date": {
-                        "type": "string",
-                        "description": "Optional start date in YYYY-MM-DD format. If provided, count becomes optional.",
-                        "pattern": "^\\d{4}-\\d{2}-\\d{2}$"
-                    }
+                "count": {
+                    "type": "integer",
+                    "description": "Number of data points to retrieve. If start_date is provided and count is 0, will fetch until end of month.",
+                    "minimum": 0,
+                    "default": 24
                 },
-                "required": ["home_id"]
-            }
-        ),
-        types.Tool(
-            name="get-price-forecast",
-            description="Get detailed price forecasts for today and tomorrow",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "home_id": {
-                        "type": "string",
-                        "description": "The Tibber home ID"
-                    }
+                "production": {
+                    "type": "boolean",
+                    "description": "Get production instead of consumption data",
+                    "default": False
                 },
-                "required": ["home_id"]
-            }
-        )
-    ]
+                "start_date": {
+                    "type": "string",
+                    "description": "Optional start date in YYYY-MM-DD format. If provided, count becomes optional.",
+                    "pattern": "^\\d{4}-\\d{2}-\\d{2}$"
+                }
+            },
+            "required": ["home_id"]
+        }
+    ),
+    types.Tool(
+        name="get-price-forecast",
+        description="Get detailed price forecasts for today and tomorrow",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "home_id": {
+                    "type": "string",
+                    "description": "The Tibber home ID"
+                }
+            },
+            "required": ["home_id"]
+        }
+    )
+]
+
+@server.list_tools()
+async def handle_list_tools() -> list[types.Tool]:
+    """List available tools for interacting with Tibber data."""
+    return _TOOLS
+
+if orjson:
+    class _OrjsonResponse(aiohttp.ClientResponse):
+        """Client response that decodes JSON bodies with orjson.
+
+        The raw bytes go straight to orjson instead of being decoded to a
+        str first. pyTibber checks the content type before calling json().
+        """
+
+        async def json(self, **kwargs) -> Any:
+            body = await self.read()
+            return orjson.loads(body) if body else None
+
+def _create_websession() -> aiohttp.ClientSession | None:
+    """Create the HTTP session for the Tibber client.
+
+    Returns None to let pyTibber build its default session when orjson is
+    not installed.
+    """
+    if not orjson:
+        return None
+    return aiohttp.ClientSession(response_class=_OrjsonResponse)
 
 async def get_tibber_connection() -> Tibber:
-    """Get or create Tibber connection."""
-    global tibber_connection
-    if not tibber_connection:
-        tibber_connection = Tibber(
-            access_token=ACCESS_TOKEN,
-            user_agent=USER_AGENT,
-            timeout=TIMEOUT
-        )
-        await tibber_connection.update_info()
+    """Get or create Tibber connection.
+
+    The connection and its HTTP session are shared by all requests. If the
+    session has been closed underneath us, a fresh connection is built.
+    """
+    global tibber_connection, _HOMES_BY_ID
+    async with _connection_lock:
+        if tibber_connection and tibber_connection.websession.closed:
+            _stop_realtime()
+            try:
+                # Stop the old client's watchdog so it does not keep retrying
+                await tibber_connection.rt_disconnect()
+            except Exception:
+                logger.exception("Error disconnecting stale real-time client")
+            _HOMES_BY_ID = {}
+            _initialized_homes.clear()
+            _price_info_fetched_at.clear()
+            _price_stats.clear()
+            tibber_connection = None
+        if not tibber_connection:
+            connection = Tibber(
+                access_token=ACCESS_TOKEN,
+                websession=_create_websession(),
+                user_agent=USER_AGENT,
+                timeout=TIMEOUT
+            )
+            try:
+                async with _GQL_SEM:
+                    await connection.update_info()
+            except BaseException:
+                await connection.close_connection()
+                raise
+            _HOMES_BY_ID = {
+                home.home_id: home for home in connection.get_homes(only_active=False)
+            }
+            tibber_connection = connection
     return tibber_connection
 
+def _lookup_home(home_id: str) -> TibberHome | None:
+    """Return the home with the given ID from the current connection, if any."""
+    return _HOMES_BY_ID.get(home_id)
+
+async def _warm_up_connection() -> None:
+    """Connect to Tibber ahead of the first tool call."""
+    try:
+        await get_tibber_connection()
+    except Exception:
+        # Handlers reconnect lazily, so a failed startup connect is not fatal
+        logger.exception("Could not connect to Tibber")
+
+@asynccontextmanager
+async def tibber_session() -> AsyncIterator[None]:
+    """Share one Tibber connection for the lifetime of the server and close on exit.
+
+    The connection is opened by a background task so that the MCP
+    handshake does not wait for the Tibber API.
+    """
+    warm_up = asyncio.create_task(_warm_up_connection())
+    try:
+        yield
+    finally:
+        warm_up.cancel()
+        await asyncio.gather(warm_up, return_exceptions=True)
+        await cleanup()
+
+async def _reconnecting(
+    coro_factory: Callable[[], Awaitable[list[types.TextContent]]]
+) -> list[types.TextContent]:
+    """Run coro_factory, retrying once if the Tibber HTTP session was closed.
+
+    get_tibber_connection() rebuilds the client when it finds its session
+    closed, so the retry runs against a fresh connection.
+    """
+    try:
+        return await coro_factory()
+    except RuntimeError as e:
+        if "Session is closed" not in str(e):
+            raise
+        logger.warning("Tibber session was closed, reconnecting")
+        return await coro_factory()
+
+async def _ensure_home_info(home: TibberHome) -> None:
+    """Load a home's info once so currency and capability flags are available."""
+    if home.home_id in _initialized_homes:
+        return
+    if not home.info:
+        async with _GQL_SEM:
+            await home.update_info()
+    if home.info:
+        _initialized_homes.add(home.home_id)
+
+def _current_hour() -> datetime:
+    """Return the start of the current UTC hour, used to bucket price cache keys."""
+    return datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def _has_tomorrow_prices(home: TibberHome) -> bool:
+    """Return True if the home's price info already extends past today."""
+    last = home.last_data_timestamp
+    return last is not None and last.date() > datetime.now(last.tzinfo).date()
+
+async def _ensure_price_info(home: TibberHome) -> None:
+    """Fetch price info unless it was already fetched during the current hour.
+
+    Prices change hourly, so data fetched earlier in the same hour is still
+    valid. The exception is the afternoon before tomorrow's prices appear,
+    when every call checks for them.
+    """
+    hour = _current_hour()
+    if _price_info_fetched_at.get(home.home_id) == hour and (
+        hour.hour < TOMORROW_PRICES_UTC_HOUR or _has_tomorrow_prices(home)
+    ):
+        return
+    async with _GQL_SEM:
+        await home.update_price_info()
+    if home.price_total:
+        _price_info_fetched_at[home.home_id] = hour
+
+def _render_price_stats(home: TibberHome) -> list[str]:
+    """Return today's price statistics lines, computed once per home per hour."""
+    hour = _current_hour()
+    cached = _price_stats.get(home.home_id)
+    if cached and cached[0] == hour:
+        return cached[1]
+
+    stats = home.current_attributes()
+    price_unit = home.price_unit
+    lines = [
+        f"Maximum: {stats['max_price']:.3f} {price_unit}",
+        f"Average: {stats['avg_price']:.3f} {price_unit}",
+        f"Minimum: {stats['min_price']:.3f} {price_unit}",
+        "\nAverage Prices by Period:",
+        f"Night (00-08): {stats['off_peak_1']:.3f} {price_unit}",
+        f"Day (08-20): {stats['peak']:.3f} {price_unit}",
+        f"Evening (20-24): {stats['off_peak_2']:.3f} {price_unit}"
+    ]
+    # Only keep statistics computed from actual price data
+    if home.price_total:
+        _price_stats[home.home_id] = (hour, lines)
+    return lines
+
+class _UncachedResponse(list):
+    """Tool response that _cached() passes through without storing it.
+
+    Used for soft failures such as unknown homes or missing data, which
+    may resolve on the next call.
+    """
+
+def _evict_expired_cache() -> None:
+    """Drop expired cache entries and locks that no longer guard an entry."""
+    now = time.monotonic()
+    for key in [key for key, (expires, _) in _CACHE.items() if expires <= now]:
+        del _CACHE[key]
+    for key in [key for key, lock in _CACHE_LOCKS.items() if key not in _CACHE and not lock.locked()]:
+        del _CACHE_LOCKS[key]
+
+async def _cached(
+    key: tuple,
+    ttl: float,
+    coro_factory: Callable[[], Awaitable[list[types.TextContent]]]
+) -> list[types.TextContent]:
+    """Return a cached response for key, or build and cache it for ttl seconds.
+
+    A per-key lock makes concurrent callers wait for a single refill.
+    Exceptions and _UncachedResponse results from coro_factory are never
+    cached. Expired entries are evicted whenever a new one is stored.
+    """
+    entry = _CACHE.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+
+    lock = _CACHE_LOCKS.setdefault(key, asyncio.Lock())
+    async with lock:
+        entry = _CACHE.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        result = await _reconnecting(coro_factory)
+        if not isinstance(result, _UncachedResponse):
+            _evict_expired_cache()
+            _CACHE[key] = (time.monotonic() + ttl, result)
+    if key not in _CACHE and not lock.locked():
+        _CACHE_LOCKS.pop(key, None)
+    return result
+
+async def _query_all_homes(tibber: Tibber) -> list[dict[str, Any]]:
+    """Fetch list-homes data for every active home in one GraphQL request."""
+    async with _GQL_SEM:
+        data = await tibber.execute(HOMES_QUERY)
+    if not data:
+        raise RuntimeError("No home data returned by the Tibber API")
+    active_ids = set(tibber.get_home_ids())
+    return [
+        home for home in data.get("viewer", {}).get("homes") or []
+        if home.get("id") in active_ids
+    ]
+
+async def _fetch_list_homes() -> list[types.TextContent]:
+    """Build the list-homes response."""
+    tibber = await get_tibber_connection()
+    homes = await _query_all_homes(tibber)
+
+    response_text = ["Available Tibber Homes:"]
+    
+    for home in homes:
+        address = home.get("address") or {}
+        features = home.get("features") or {}
+        metering = home.get("meteringPointData") or {}
+        subscription = home.get("currentSubscription") or {}
+        current_price = (subscription.get("priceInfo") or {}).get("current") or {}
+        response_text.extend([
+            f"\nHome: {home.get('appNickname') or address.get('address1', '')}",
+            f"ID: {home.get('id')}",
+            f"Address: {address.get('address1', '')}",
+            f"Country: {address.get('country', '')}",
+            f"Currency: {current_price.get('currency', '')}",
+            f"Has Active Subscription: {subscription.get('status') in ACTIVE_SUBSCRIPTION_STATUSES}",
+            f"Has Real-time Consumption: {features.get('realTimeConsumptionEnabled')}",
+            f"Has Production: {bool(metering.get('productionEan'))}",
+            f"Metering Point Data:",
+            f"  - Grid Company: {metering.get('gridCompany', 'N/A')}",
+            f"  - Estimated Annual Consumption: {metering.get('estimatedAnnualConsumption', 'N/A')} kWh",
+            f"  - Energy Tax Type: {metering.get('energyTaxType', 'N/A')}",
+            f"  - VAT Type: {metering.get('vatType', 'N/A')}"
+        ])
+    
+    return [types.TextContent(
+        type="text",
+        text="\n".join(response_text)
+    )]
+
 async def handle_list_homes() -> list[types.TextContent]:
     """Handle list-homes tool request."""
     try:
-        tibber = await get_tibber_connection()
-        homes = tibber.get_homes()
-        response_text = ["Available Tibber Homes:"]
-        
-        for home in homes:
-            await home.update_info()
-            response_text.extend([
-                f"\nHome: {home.name}",
-                f"ID: {home.home_id}",
-                f"Address: {home.address1}",
-                f"Country: {home.country}",
-                f"Currency: {home.currency}",
-                f"Has Active Subscription: {home.has_active_subscription}",
-                f"Has Real-time Consumption: {home.has_real_time_consumption}",
-                f"Has Production: {home.has_production}",
-                f"Metering Point Data:",
-                f"  - Grid Company: {home.info.get('viewer', {}).get('home', {}).get('meteringPointData', {}).get('gridCompany', 'N/A')}",
-                f"  - Estimated Annual Consumption: {home.info.get('viewer', {}).get('home', {}).get('meteringPointData', {}).get('estimatedAnnualConsumption', 'N/A')} kWh",
-                f"  - Energy Tax Type: {home.info.get('viewer', {}).get('home', {}).get('meteringPointData', {}).get('energyTaxType', 'N/A')}",
-                f"  - VAT Type: {home.info.get('viewer', {}).get('home', {}).get('meteringPointData', {}).get('vatType', 'N/A')}"
-            ])
-        
+        return await _cached(
+            ("list-homes",),
+            HOMES_CACHE_TTL,
+            _fetch_list_homes
+        )
+    except Exception as e:
+        logger.exception("Error listing homes")
         return [types.TextContent(
             type="text",
-            text="\n".join(response_text)
+            text=f"Error listing homes: {str(e)}"
         )]
-    except Exception as e:
+
+async def _fetch_production(home_id: str, hours: int) -> list[types.TextContent]:
+    """Build the get-production response."""
+    await get_tibber_connection()
+    home = _lookup_home(home_id)
+    if not home:
         return [types.TextContent(
             type="text",
-            text=f"Error listing homes: {str(e)}"
+            text=f"No home found with ID {home_id}"
         )]
 
-async def handle_get_production(home_id: str, hours: int) -> list[types.TextContent]:
-    """Handle get-production tool request."""
-    try:
-        tibber = await get_tibber_connection()
-        home = tibber.get_home(home_id)
-        if not home:
-            return [types.TextContent(
-                type="text",
-                text=f"No home found with ID {home_id}"
-            )]
+    await _ensure_home_info(home)
 
-        if not home.has_production:
-            return [types.TextContent(
-                type="text",
-                text=f"This home does not have production capability"
-            )]
+    if not home.has_production:
+        return [types.TextContent(
+            type="text",
+            text=f"This home does not have production capability"
+        )]
 
+    async with _GQL_SEM:
         production_data = await home.get_historic_data(hours, production=True)
-        if not production_data:
-            return [types.TextContent(
-                type="text",
-                text="No production data available for the specified period"
-            )]
-        
-        response_text = ["Energy Production Data:"]
-        for entry in production_data:
-            timestamp = datetime.fromisoformat(entry["from"]).astimezone(timezone.utc)
-            production = entry.get("production", 0)
-            profit = entry.get("profit", 0)
-            # Format values with None checks
-            time_str = timestamp.strftime('%Y-%m-%d %H:%M UTC') if timestamp else 'N/A'
-            production_str = f"{production:.2f} kWh" if production is not None else 'N/A'
-            profit_str = f"{profit:.2f} {home.currency}" if profit is not None and home.currency else 'N/A'
-            
-            response_text.append(
-                f"\nTime: {time_str}"
-                f"\nProduction: {production_str}"
-                f"\nProfit: {profit_str}"
-            )
-
+    if not production_data:
         return [types.TextContent(
             type="text",
-            text="\n".join(response_text)
+            text="No production data available for the specified period"
         )]
+
+    currency = home.currency
+    buf = io.StringIO()
+    buf.write("Energy Production Data:")
+    for entry in production_data:
+        timestamp = datetime.fromisoformat(entry["from"]).astimezone(timezone.utc)
+        production = entry.get("production", 0)
+        profit = entry.get("profit", 0)
+        # Format values with None checks
+        time_str = timestamp.strftime(ROW_TIME_FORMAT)
+        production_str = f"{production:.2f} kWh" if production is not None else 'N/A'
+        profit_str = f"{profit:.2f} {currency}" if profit is not None and currency else 'N/A'
+
+        buf.write(PRODUCTION_ROW.format_map(
+            {"t": time_str, "v": production_str, "c": profit_str}
+        ))
+
+    return [types.TextContent(
+        type="text",
+        text=buf.getvalue()
+    )]
+
+async def handle_get_production(home_id: str, hours: int) -> list[types.TextContent]:
+    """Handle get-production tool request."""
+    try:
+        return await _reconnecting(lambda: _fetch_production(home_id, hours))
     except Exception as e:
+        logger.exception("Error getting production data for %s", home_id)
         return [types.TextContent(
             type="text",
             text=f"Error getting production data: {str(e)}"
         )]
 
-async def handle_get_price_info(home_id: str) -> list[types.TextContent]:
-    """Handle get-price-info tool request."""
-    try:
-        tibber = await get_tibber_connection()
-        home = tibber.get_home(home_id)
-        if not home:
-            return [types.TextContent(
-                type="text",
-                text=f"No home found with ID {home_id}"
-            )]
+async def _fetch_price_info(home_id: str) -> list[types.TextContent]:
+    """Build the get-price-info response."""
+    await get_tibber_connection()
+    home = _lookup_home(home_id)
+    if not home:
+        return _UncachedResponse([types.TextContent(
+            type="text",
+            text=f"No home found with ID {home_id}"
+        )])
 
-        await home.update_price_info()
-        current_price, price_level, price_time, price_rank = home.current_price_data()
-        daily_prices = home.current_attributes()
-        
-        response_text = ["Electricity Price Information:"]
-        
-        if current_price and price_time:
-            response_text.extend([
-                f"\nCurrent Price ({price_time.strftime('%Y-%m-%d %H:%M')})",
-                f"Price: {current_price:.3f} {home.price_unit}",
-                f"Level: {price_level or 'N/A'}",
-                f"Rank today: {price_rank or 'N/A'}/24"
-            ])
-        
+    await _ensure_home_info(home)
+    await _ensure_price_info(home)
+    current_price, price_level, price_time, price_rank = home.current_price_data()
+    
+    response_text = ["Electricity Price Information:"]
+    
+    if current_price and price_time:
         response_text.extend([
-            f"\nToday's Price Statistics:",
-            f"Maximum: {daily_prices['max_price']:.3f} {home.price_unit}",
-            f"Average: {daily_prices['avg_price']:.3f} {home.price_unit}",
-            f"Minimum: {daily_prices['min_price']:.3f} {home.price_unit}",
-            f"\nAverage Prices by Period:",
-            f"Night (00-08): {daily_prices['off_peak_1']:.3f} {home.price_unit}",
-            f"Day (08-20): {daily_prices['peak']:.3f} {home.price_unit}",
-            f"Evening (20-24): {daily_prices['off_peak_2']:.3f} {home.price_unit}"
+            f"\nCurrent Price ({price_time.strftime('%Y-%m-%d %H:%M')})",
+            f"Price: {current_price:.3f} {home.price_unit}",
+            f"Level: {price_level or 'N/A'}",
+            f"Rank today: {price_rank or 'N/A'}/24"
         ])
+    
+    response_text.append("\nToday's Price Statistics:")
+    response_text.extend(_render_price_stats(home))
 
-        return [types.TextContent(
-            type="text",
-            text="\n".join(response_text)
-        )]
+    response = [types.TextContent(
+        type="text",
+        text="\n".join(response_text)
+    )]
+    # Statistics computed without price data are all zeros; don't keep them
+    return response if home.price_total else _UncachedResponse(response)
+
+async def handle_get_price_info(home_id: str) -> list[types.TextContent]:
+    """Handle get-price-info tool request."""
+    try:
+        return await _cached(
+            ("get-price-info", home_id, _current_hour()),
+            PRICE_CACHE_TTL,
+            lambda: _fetch_price_info(home_id)
+        )
     except Exception as e:
+        logger.exception("Error getting price information for %s", home_id)
         return [types.TextContent(
             type="text",
             text=f"Error getting price information: {str(e)}"
         )]
 
-async def handle_get_consumption(home_id: str, hours: int) -> list[types.TextContent]:
-    """Handle get-consumption tool request."""
-    try:
-        tibber = await get_tibber_connection()
-        home = tibber.get_home(home_id)
-        if not home:
-            return [types.TextContent(
-                type="text",
-                text=f"No home found with ID {home_id}"
-            )]
+async def _fetch_consumption(home_id: str, hours: int) -> list[types.TextContent]:
+    """Build the get-consumption response."""
+    await get_tibber_connection()
+    home = _lookup_home(home_id)
+    if not home:
+        return [types.TextContent(
+            type="text",
+            text=f"No home found with ID {home_id}"
+        )]
 
-        await home.update_info()
-        await home.fetch_consumption_data()
+    await _ensure_home_info(home)
+    async with _GQL_SEM:
         consumption_data = await home.get_historic_data(hours)
-        if not consumption_data:
-            return [types.TextContent(
-                type="text",
-                text="No consumption data available for the specified period"
-            )]
-        
-        response_text = ["Energy Consumption Data:"]
-        for entry in consumption_data:
-            timestamp = datetime.fromisoformat(entry["from"]).astimezone(timezone.utc)
-            consumption = entry.get("consumption", 0)
-            cost = entry.get("cost", 0)
-            # Format values with None checks
-            time_str = timestamp.strftime('%Y-%m-%d %H:%M UTC') if timestamp else 'N/A'
-            consumption_str = f"{consumption:.2f} kWh" if consumption is not None else 'N/A'
-            cost_str = f"{cost:.2f} {home.currency}" if cost is not None and home.currency else 'N/A'
-            
-            response_text.append(
-                f"\nTime: {time_str}"
-                f"\nConsumption: {consumption_str}"
-                f"\nCost: {cost_str}"
-            )
-
+    if not consumption_data:
         return [types.TextContent(
             type="text",
-            text="\n".join(response_text)
+            text="No consumption data available for the specified period"
         )]
+
+    currency = home.currency
+    buf = io.StringIO()
+    buf.write("Energy Consumption Data:")
+    for entry in consumption_data:
+        timestamp = datetime.fromisoformat(entry["from"]).astimezone(timezone.utc)
+        consumption = entry.get("consumption", 0)
+        cost = entry.get("cost", 0)
+        # Format values with None checks
+        time_str = timestamp.strftime(ROW_TIME_FORMAT)
+        consumption_str = f"{consumption:.2f} kWh" if consumption is not None else 'N/A'
+        cost_str = f"{cost:.2f} {currency}" if cost is not None and currency else 'N/A'
+
+        buf.write(CONSUMPTION_ROW.format_map(
+            {"t": time_str, "v": consumption_str, "c": cost_str}
+        ))
+
+    return [types.TextContent(
+        type="text",
+        text=buf.getvalue()
+    )]
+
+async def handle_get_consumption(home_id: str, hours: int) -> list[types.TextContent]:
+    """Handle get-consumption tool request."""
+    try:
+        return await _reconnecting(lambda: _fetch_consumption(home_id, hours))
     except Exception as e:
+        logger.exception("Error getting consumption data for %s", home_id)
         return [types.TextContent(
             type="text",
             text=f"Error getting consumption data: {str(e)}"
         )]
 
-async def handle_get_realtime(home_id: str) -> list[types.TextContent]:
-    """Handle get-realtime tool request."""
-    try:
-        tibber = await get_tibber_connection()
-        home = tibber.get_home(home_id)
-        if not home:
-            return [types.TextContent(
-                type="text",
-                text=f"No home found with ID {home_id}"
-            )]
+async def _latest_realtime(home: TibberHome) -> dict | None:
+    """Return the latest real-time sample for a home.
 
-        if not home.has_real_time_consumption:
-            return [types.TextContent(
-                type="text",
-                text="This home does not have real-time monitoring capability"
-            )]
+    The first call starts a subscription that stays open and keeps
+    _rt_latest up to date, so later calls return without waiting. A
+    reading older than RT_MAX_SAMPLE_AGE is not served; the call waits
+    for a new one and resubscribes if none arrives.
+    """
+    home_id = home.home_id
+    if home_id not in _rt_subscribed:
+        event = _rt_events[home_id] = asyncio.Event()
 
-        # Set up a future to store the result
-        result_future = asyncio.Future()
-        
         def callback(data: dict) -> None:
             """Callback for real-time data."""
-            if not result_future.done():
-                result_future.set_result(data)
+            _rt_latest[home_id] = (time.monotonic(), data)
+            event.set()
 
-        # Subscribe to real-time updates
-        await home.rt_subscribe(callback)
-        
+        _rt_subscribed.add(home_id)
         try:
-            # Wait for first reading with timeout
-            data = await asyncio.wait_for(result_future, timeout=30.0)
-            
-            if not data or "data" not in data:
-                return [types.TextContent(
-                    type="text",
-                    text="No real-time data received"
-                )]
-            
-            live = data["data"]["liveMeasurement"]
-            
-            response_text = ["Real-time Power Reading:"]
-            response_text.extend([
-                f"\nTimestamp: {live.get('timestamp', 'N/A')}",
-                f"Power: {live.get('power', 'N/A')} W",
-                f"Accumulated Consumption: {live.get('accumulatedConsumption', 'N/A')} kWh",
-                f"Accumulated Cost: {live.get('accumulatedCost', 'N/A')} {live.get('currency', '')}",
-                "\nPower Details:",
-                f"Average Power: {live.get('averagePower', 'N/A')} W",
-                f"Min Power: {live.get('minPower', 'N/A')} W",
-                f"Max Power: {live.get('maxPower', 'N/A')} W",
-                "\nVoltage Readings:",
-                f"Phase 1: {live.get('voltagePhase1', 'N/A')} V",
-                f"Phase 2: {live.get('voltagePhase2', 'N/A')} V",
-                f"Phase 3: {live.get('voltagePhase3', 'N/A')} V",
-                "\nCurrent Readings:",
-                f"Phase 1: {live.get('currentL1', 'N/A')} A",
-                f"Phase 2: {live.get('currentL2', 'N/A')} A",
-                f"Phase 3: {live.get('currentL3', 'N/A')} A",
-                f"\nPower Factor: {live.get('powerFactor', 'N/A')}",
-                f"Signal Strength: {live.get('signalStrength', 'N/A')} %"
-            ])
-            
-            return [types.TextContent(
-                type="text",
-                text="\n".join(response_text)
-            )]
-            
-        finally:
-            # Clean up subscription
+            await home.rt_subscribe(callback)
+        except BaseException:
+            _rt_subscribed.discard(home_id)
+            raise
+
+    sample = _rt_latest.get(home_id)
+    if sample and time.monotonic() - sample[0] <= RT_MAX_SAMPLE_AGE:
+        return sample[1]
+
+    # No reading yet, or the stream has gone quiet: wait for the next one
+    event = _rt_events[home_id]
+    event.clear()
+    try:
+        await asyncio.wait_for(event.wait(), timeout=RT_SAMPLE_TIMEOUT)
+    except asyncio.TimeoutError:
+        # The subscription looks dead; restart it so a later call can succeed.
+        # Like the first rt_subscribe(), this stays outside _GQL_SEM.
+        logger.warning("No real-time data for %s, resubscribing", home_id)
+        await home.rt_resubscribe()
+        raise TimeoutError(
+            f"No real-time data received within {RT_SAMPLE_TIMEOUT:g} seconds"
+        ) from None
+    return _rt_latest[home_id][1]
+
+def _stop_realtime() -> None:
+    """Cancel all real-time subscriptions and forget their samples."""
+    for home_id in _rt_subscribed:
+        if home := _HOMES_BY_ID.get(home_id):
             home.rt_unsubscribe()
-            
+    _rt_subscribed.clear()
+    _rt_latest.clear()
+    _rt_events.clear()
+
+async def _fetch_realtime(home_id: str) -> list[types.TextContent]:
+    """Build the get-realtime response."""
+    await get_tibber_connection()
+    home = _lookup_home(home_id)
+    if not home:
+        return [types.TextContent(
+            type="text",
+            text=f"No home found with ID {home_id}"
+        )]
+
+    await _ensure_home_info(home)
+
+    if not home.has_real_time_consumption:
+        return [types.TextContent(
+            type="text",
+            text="This home does not have real-time monitoring capability"
+        )]
+
+    data = await _latest_realtime(home)
+    if not data or "data" not in data:
+        return [types.TextContent(
+            type="text",
+            text="No real-time data received"
+        )]
+
+    live = data["data"]["liveMeasurement"]
+
+    response_text = ["Real-time Power Reading:"]
+    response_text.extend([
+        f"\nTimestamp: {live.get('timestamp', 'N/A')}",
+        f"Power: {live.get('power', 'N/A')} W",
+        f"Accumulated Consumption: {live.get('accumulatedConsumption', 'N/A')} kWh",
+        f"Accumulated Cost: {live.get('accumulatedCost', 'N/A')} {live.get('currency', '')}",
+        "\nPower Details:",
+        f"Average Power: {live.get('averagePower', 'N/A')} W",
+        f"Min Power: {live.get('minPower', 'N/A')} W",
+        f"Max Power: {live.get('maxPower', 'N/A')} W",
+        "\nVoltage Readings:",
+        f"Phase 1: {live.get('voltagePhase1', 'N/A')} V",
+        f"Phase 2: {live.get('voltagePhase2', 'N/A')} V",
+        f"Phase 3: {live.get('voltagePhase3', 'N/A')} V",
+        "\nCurrent Readings:",
+        f"Phase 1: {live.get('currentL1', 'N/A')} A",
+        f"Phase 2: {live.get('currentL2', 'N/A')} A",
+        f"Phase 3: {live.get('currentL3', 'N/A')} A",
+        f"\nPower Factor: {live.get('powerFactor', 'N/A')}",
+        f"Signal Strength: {live.get('signalStrength', 'N/A')} %"
+    ])
+
+    return [types.TextContent(
+        type="text",
+        text="\n".join(response_text)
+    )]
+
+async def handle_get_realtime(home_id: str) -> list[types.TextContent]:
+    """Handle get-realtime tool request."""
+    try:
+        return await _reconnecting(lambda: _fetch_realtime(home_id))
     except Exception as e:
+        logger.exception("Error getting real-time data for %s", home_id)
         return [types.TextContent(
             type="text",
             text=f"Error getting real-time data: {str(e)}"
         )]
 
+async def _fetch_price_forecast(home_id: str) -> list[types.TextContent]:
+    """Build the get-price-forecast response."""
+    await get_tibber_connection()
+    home = _lookup_home(home_id)
+    if not home:
+        return _UncachedResponse([types.TextContent(
+            type="text",
+            text=f"No home found with ID {home_id}"
+        )])
+
+    await _ensure_home_info(home)
+    await _ensure_price_info(home)
+    price_info = home.price_total
+    price_levels = home.price_level
+    
+    if not price_info:
+        return _UncachedResponse([types.TextContent(
+            type="text",
+            text="No price forecast data available"
+        )])
+
+    response_text = ["Price Forecast:"]
+    
+    # Parse each timestamp once and sort chronologically; sorting the raw
+    # strings misorders entries whose UTC offsets differ (DST changes)
+    parsed = [
+        (datetime.fromisoformat(time_str), price, price_levels.get(time_str, "UNKNOWN"))
+        for time_str, price in price_info.items()
+    ]
+    parsed.sort(key=lambda item: item[0])
+    today = datetime.now(timezone.utc).date()
+    tomorrow = today + timedelta(days=1)
+    
+    # Group prices by day
+    today_prices = []
+    tomorrow_prices = []
+    
+    for item in parsed:
+        price_date = item[0].date()
+        if price_date == today:
+            today_prices.append(item)
+        elif price_date == tomorrow:
+            tomorrow_prices.append(item)
+
+    price_unit = home.price_unit
+
+    # Format today's prices
+    if today_prices:
+        response_text.append("\nToday's Prices:")
+        for price_time, price, level in today_prices:
+            response_text.append(
+                f"\n{price_time.strftime('%H:%M')}: {price:.3f} {price_unit}"
+                f" ({level})"
+            )
+
+    # Format tomorrow's prices
+    if tomorrow_prices:
+        response_text.append("\nTomorrow's Prices:")
+        for price_time, price, level in tomorrow_prices:
+            response_text.append(
+                f"\n{price_time.strftime('%H:%M')}: {price:.3f} {price_unit}"
+                f" ({level})"
+            )
+
+    # Add price statistics
+    response_text.append("\nPrice Statistics:")
+    response_text.extend(_render_price_stats(home))
+
+    return [types.TextContent(
+        type="text",
+        text="\n".join(response_text)
+    )]
+
 async def handle_get_price_forecast(home_id: str) -> list[types.TextContent]:
     """Handle get-price-forecast tool request."""
     try:
-        tibber = await get_tibber_connection()
-        home = tibber.get_home(home_id)
-        if not home:
-            return [types.TextContent(
-                type="text",
-                text=f"No home found with ID {home_id}"
-            )]
+        return await _cached(
+            ("get-price-forecast", home_id, _current_hour()),
+            PRICE_CACHE_TTL,
+            lambda: _fetch_price_forecast(home_id)
+        )
+    except Exception as e:
+        logger.exception("Error getting price forecast for %s", home_id)
+        return [types.TextContent(
+            type="text",
+            text=f"Error getting price forecast: {str(e)}"
+        )]
 
-        await home.update_price_info()
-        price_info = home.price_total
-        price_levels = home.price_level
-        
-        if not price_info:
+async def _fetch_historic(
+    home_id: str,
+    resolution: str,
+    count: int,
+    production: bool,
+    start_date: str | None
+) -> list[types.TextContent]:
+    """Build the get-historic response."""
+    await get_tibber_connection()
+    home = _lookup_home(home_id)
+    if not home:
+        return _UncachedResponse([types.TextContent(
+            type="text",
+            text=f"No home found with ID {home_id}"
+        )])
+
+    await _ensure_home_info(home)
+    if production and not home.has_production:
+        return [types.TextContent(
+            type="text",
+            text="This home does not have production capability"
+        )]
+    if start_date:
+        try:
+            date_from = datetime.fromisoformat(start_date).replace(tzinfo=timezone.utc)
+        except ValueError:
             return [types.TextContent(
                 type="text",
-                text="No price forecast data available"
+                text=f"Invalid date format: {start_date}. Please use YYYY-MM-DD format."
             )]
+        logger.debug("historic date_from=%s", date_from)
+        async with _GQL_SEM:
+            historic_data = await home.get_historic_data_date(
+                date_from=date_from,
+                n_data=count,
+                resolution=resolution,
+                production=production
+            )
+    else:
+        async with _GQL_SEM:
+            historic_data = await home.get_historic_data(
+                count,
+                resolution=resolution,
+                production=production
+            )
+    if not historic_data:
+        return _UncachedResponse([types.TextContent(
+            type="text",
+            text=f"No {'production' if production else 'consumption'} data available for the specified period"
+        )])
+    
+    data_type = "Production" if production else "Consumption"
+    value_key = "production" if production else "consumption"
+    cost_key = "profit" if production else "cost"
+    currency = home.currency
+    row_template = PRODUCTION_ROW if production else CONSUMPTION_ROW
+    contents = []
+    
+    # Render in fixed-size chunks so large responses are split into several blocks
+    for start in range(0, len(historic_data), HISTORIC_CHUNK_SIZE):
+        buf = io.StringIO()
+        if start == 0:
+            buf.write(f"Historical {data_type} Data ({resolution}):")
 
-        response_text = ["Price Forecast:"]
-        
-        # Sort prices by timestamp
-        sorted_times = sorted(price_info.keys())
-        current_time = datetime.now(timezone.utc)
-        
-        # Group prices by day
-        today_prices = []
-        tomorrow_prices = []
-        
-        for time_str in sorted_times:
-            price_time = datetime.fromisoformat(time_str)
-            if price_time.date() == current_time.date():
-                today_prices.append((time_str, price_info[time_str], price_levels.get(time_str, "UNKNOWN")))
-            elif price_time.date() == current_time.date() + timedelta(days=1):
-                tomorrow_prices.append((time_str, price_info[time_str], price_levels.get(time_str, "UNKNOWN")))
-
-        # Format today's prices
-        if today_prices:
-            response_text.append("\nToday's Prices:")
-            for time_str, price, level in today_prices:
-                time = datetime.fromisoformat(time_str)
-                response_text.append(
-                    f"\n{time.strftime('%H:%M')}: {price:.3f} {home.price_unit}"
-                    f" ({level})"
-                )
-
-        # Format tomorrow's prices
-        if tomorrow_prices:
-            response_text.append("\nTomorrow's Prices:")
-            for time_str, price, level in tomorrow_prices:
-                time = datetime.fromisoformat(time_str)
-                response_text.append(
-                    f"\n{time.strftime('%H:%M')}: {price:.3f} {home.price_unit}"
-                    f" ({level})"
-                )
-
-        # Add price statistics
-        daily_stats = home.current_attributes()
-        response_text.extend([
-            "\nPrice Statistics:",
-            f"Maximum: {daily_stats['max_price']:.3f} {home.price_unit}",
-            f"Average: {daily_stats['avg_price']:.3f} {home.price_unit}",
-            f"Minimum: {daily_stats['min_price']:.3f} {home.price_unit}",
-            "\nAverage Prices by Period:",
-            f"Night (00-08): {daily_stats['off_peak_1']:.3f} {home.price_unit}",
-            f"Day (08-20): {daily_stats['peak']:.3f} {home.price_unit}",
-            f"Evening (20-24): {daily_stats['off_peak_2']:.3f} {home.price_unit}"
-        ])
+        for entry in historic_data[start:start + HISTORIC_CHUNK_SIZE]:
+            timestamp = datetime.fromisoformat(entry["from"]).astimezone(timezone.utc)
+            value = entry.get(value_key, 0)
+            cost = entry.get(cost_key, 0)
+            
+            # Format values with None checks
+            time_str = timestamp.strftime(ROW_TIME_FORMAT)
+            value_str = f"{value:.2f} kWh" if value is not None else 'N/A'
+            cost_str = f"{cost:.2f} {currency}" if cost is not None and currency else 'N/A'
+            
+            buf.write(row_template.format_map(
+                {"t": time_str, "v": value_str, "c": cost_str}
+            ))
 
-        return [types.TextContent(
+        contents.append(types.TextContent(
             type="text",
-            text="\n".join(response_text)
-        )]
-    except Exception as e:
-        return [types.TextContent(
-            type="text",
-            text=f"Error getting price forecast: {str(e)}"
-        )]
+            text=buf.getvalue().lstrip("\n")
+        ))
+
+    return contents
+
+def _historic_range_end(date_from: date, resolution: str, count: int) -> date:
+    """Return the first day after a historic range starting at date_from."""
+    if count == 0:
+        # pyTibber asks for as many data points as there are days left in
+        # the month, at whatever resolution was requested
+        next_month = (date_from.replace(day=1) + timedelta(days=32)).replace(day=1)
+        count = (next_month - date_from).days
+    if resolution == "HOURLY":
+        return date_from + timedelta(days=-(-count // 24))
+    if resolution == "DAILY":
+        return date_from + timedelta(days=count)
+    if resolution == "WEEKLY":
+        return date_from + timedelta(weeks=count)
+    if resolution == "MONTHLY":
+        months = date_from.month - 1 + count
+        return date(date_from.year + months // 12, months % 12 + 1, 1)
+    return date(date_from.year + count, 1, 1)
+
+def _historic_range_is_settled(resolution: str, count: int, start_date: str | None) -> bool:
+    """Return True if a get-historic request only covers days well before today."""
+    if not start_date:
+        return False
+    try:
+        date_from = date.fromisoformat(start_date)
+    except ValueError:
+        return False
+    # Compare against yesterday to leave slack for the home's local time zone
+    yesterday = datetime.now(timezone.utc).date() - timedelta(days=1)
+    try:
+        return _historic_range_end(date_from, resolution, count) <= yesterday
+    except (ValueError, OverflowError):
+        # Ranges reaching past year 9999 are certainly not settled
+        return False
 
 async def handle_get_historic(
     home_id: str, 
@@ -518,146 +1034,122 @@ async def handle_get_historic(
         production: Whether to get production instead of consumption data
         start_date: Optional start date in YYYY-MM-DD format
     """
-    """Handle get-historic tool request."""
     try:
-        tibber = await get_tibber_connection()
-        home = tibber.get_home(home_id)
-        if not home:
-            return [types.TextContent(
-                type="text",
-                text=f"No home found with ID {home_id}"
-            )]
-
-        if production and not home.has_production:
-            return [types.TextContent(
-                type="text",
-                text="This home does not have production capability"
-            )]
-        if start_date:
-            try:
-                date_from = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-                historic_data = await home.get_historic_data_date(
-                    date_from=date_from,
-                    n_data=count,
-                    resolution=resolution,
-                    production=production
-                )
-            except ValueError:
-                return [types.TextContent(
-                    type="text",
-                    text=f"Invalid date format: {start_date}. Please use YYYY-MM-DD format."
-                )]
-        else:
-            historic_data = await home.get_historic_data(
-                count,
-                resolution=resolution,
-                production=production
+        # Data for a range that ended before today is settled, so it can be served from cache
+        if _historic_range_is_settled(resolution, count, start_date):
+            return await _cached(
+                ("get-historic", home_id, resolution, count, production, start_date),
+                HISTORIC_CACHE_TTL,
+                lambda: _fetch_historic(home_id, resolution, count, production, start_date)
             )
-        if not historic_data:
-            return [types.TextContent(
-                type="text",
-                text=f"No {'production' if production else 'consumption'} data available for the specified period"
-            )]
-        
-        data_type = "Production" if production else "Consumption"
-        response_text = [f"Historical {data_type} Data ({resolution}):"]
-        
-        for entry in historic_data:
-            timestamp = datetime.fromisoformat(entry["from"]).astimezone(timezone.utc)
-            value = entry.get("production" if production else "consumption", 0)
-            cost = entry.get("profit" if production else "cost", 0)
-            
-            # Format values with None checks
-            time_str = timestamp.strftime('%Y-%m-%d %H:%M UTC') if timestamp else 'N/A'
-            value_str = f"{value:.2f} kWh" if value is not None else 'N/A'
-            cost_str = f"{cost:.2f} {home.currency}" if cost is not None and home.currency else 'N/A'
-            
-            response_text.append(
-                f"\nTime: {time_str}"
-                f"\n{data_type}: {value_str}"
-                f"\n{'Profit' if production else 'Cost'}: {cost_str}"
-            )
-
-        return [types.TextContent(
-            type="text",
-            text="\n".join(response_text)
-        )]
+        return await _reconnecting(
+            lambda: _fetch_historic(home_id, resolution, count, production, start_date)
+        )
     except Exception as e:
+        logger.exception("Error getting historic data for %s", home_id)
         return [types.TextContent(
             type="text",
             text=f"Error getting historic data: {str(e)}"
         )]
         
+@dataclass(frozen=True)
+class NoArgs:
+    """Arguments for tools that take none."""
+
+@dataclass(frozen=True)
+class HomeArgs:
+    """Arguments for tools that only take a home."""
+    home_id: Annotated[str, Field(min_length=1)]
+
+@dataclass(frozen=True)
+class HoursArgs:
+    """Arguments for get-consumption and get-production."""
+    home_id: Annotated[str, Field(min_length=1)]
+    hours: Annotated[int, Field(ge=1)] = 24
+
+@dataclass(frozen=True)
+class HistoricArgs:
+    """Arguments for get-historic."""
+    home_id: Annotated[str, Field(min_length=1)]
+    resolution: Literal["HOURLY", "DAILY", "WEEKLY", "MONTHLY", "ANNUAL"] = "HOURLY"
+    count: Annotated[int, Field(ge=0)] = 24
+    production: bool = False
+    start_date: Annotated[str, Field(pattern=r"^\d{4}-\d{2}-\d{2}$")] | None = None
+
+# Validators are built once and shared by every call
+_NO_ARGS_ADAPTER = TypeAdapter(NoArgs)
+_HOME_ADAPTER = TypeAdapter(HomeArgs)
+_HOURS_ADAPTER = TypeAdapter(HoursArgs)
+_HISTORIC_ADAPTER = TypeAdapter(HistoricArgs)
+
+# Tool name -> (argument validator, handler taking the validated arguments)
+_DISPATCH: dict[str, tuple[TypeAdapter, Callable[[Any], Awaitable[list[types.TextContent]]]]] = {
+    "list-homes": (
+        _NO_ARGS_ADAPTER,
+        lambda args: handle_list_homes()
+    ),
+    "get-production": (
+        _HOURS_ADAPTER,
+        lambda args: handle_get_production(args.home_id, args.hours)
+    ),
+    "get-price-info": (
+        _HOME_ADAPTER,
+        lambda args: handle_get_price_info(args.home_id)
+    ),
+    "get-consumption": (
+        _HOURS_ADAPTER,
+        lambda args: handle_get_consumption(args.home_id, args.hours)
+    ),
+    "get-realtime": (
+        _HOME_ADAPTER,
+        lambda args: handle_get_realtime(args.home_id)
+    ),
+    "get-historic": (
+        _HISTORIC_ADAPTER,
+        lambda args: handle_get_historic(
+            args.home_id, args.resolution, args.count, args.production, args.start_date
+        )
+    ),
+    "get-price-forecast": (
+        _HOME_ADAPTER,
+        lambda args: handle_get_price_forecast(args.home_id)
+    ),
+}
+
 @server.call_tool() 
 async def handle_call_tool(
     name: str, arguments: dict | None
 ) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
     """Handle tool execution requests."""
-    global tibber_connection
-    
     if not arguments and name != "list-homes":
         raise ValueError("Missing arguments")
 
-    if name == "list-homes":
-        return await handle_list_homes()
-    
-    elif name == "get-production":
-        home_id = arguments.get("home_id")
-        if not home_id:
-            raise ValueError("Missing home_id")
-        hours = int(arguments.get("hours", 24))
-        return await handle_get_production(home_id, hours)
-    
-    elif name == "get-price-info":
-        home_id = arguments.get("home_id")
-        if not home_id:
-            raise ValueError("Missing home_id")
-        return await handle_get_price_info(home_id)
-    
-    elif name == "get-consumption":
-        home_id = arguments.get("home_id")
-        if not home_id:
-            raise ValueError("Missing home_id")
-        hours = int(arguments.get("hours", 24))
-        return await handle_get_consumption(home_id, hours)
-    
-    elif name == "get-realtime":
-        home_id = arguments.get("home_id")
-        if not home_id:
-            raise ValueError("Missing home_id")
-        return await handle_get_realtime(home_id)
-    
-    elif name == "get-historic":
-        home_id = arguments.get("home_id")
-        if not home_id:
-            raise ValueError("Missing home_id")
-        resolution = arguments.get("resolution", "HOURLY")
-        count = int(arguments.get("count", 24))
-        production = bool(arguments.get("production", False))
-        start_date = arguments.get("start_date")
-        return await handle_get_historic(home_id, resolution, count, production, start_date)
-    
-    elif name == "get-price-forecast":
-        home_id = arguments.get("home_id")
-        if not home_id:
-            raise ValueError("Missing home_id")
-        return await handle_get_price_forecast(home_id)
-    
-    else:
+    entry = _DISPATCH.get(name)
+    if entry is None:
         raise ValueError(f"Unknown tool: {name}")
+    adapter, handler = entry
+    return await handler(adapter.validate_python(arguments or {}))
 
 async def cleanup():
     """Cleanup Tibber connection."""
-    global tibber_connection
+    global tibber_connection, _HOMES_BY_ID
+    _stop_realtime()
+    _HOMES_BY_ID = {}
+    _CACHE.clear()
+    _CACHE_LOCKS.clear()
+    _initialized_homes.clear()
+    _price_info_fetched_at.clear()
+    _price_stats.clear()
     if tibber_connection:
+        await tibber_connection.rt_disconnect()
         await tibber_connection.close_connection()
         tibber_connection = None
 
 
 
 async def main():
-    # Run the server using stdin/stdout streams
-    try:
+    # Run the server using stdin/stdout streams, sharing one Tibber session
+    async with tibber_session():
         async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
             await server.run(
                 read_stream,
@@ -671,5 +1163,3 @@ async def main():
                     ),
                 ),
             )
-    finally:
-        await cleanup()